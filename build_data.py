@@ -0,0 +1,29 @@
+"""One-time conversion of data/weather.csv into data/weather.parquet.
+
+Run this whenever data/weather.csv changes:
+
+    python build_data.py
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent/'data'
+
+
+def build_weather_data():
+    df = pd.read_csv(DATA_DIR/'weather.csv')
+
+    df['time'] = pd.to_datetime(df['time'])
+    df['year'] = df['time'].dt.year.astype(np.int16)
+    df['month'] = df['time'].dt.month.astype(np.int8)
+    df['day_of_year'] = df['time'].dt.dayofyear.astype(np.int16)
+    df['Ftemp'] = ((df['Ktemp'] - 273.15) * (9/5) + 32).astype(np.float32)
+    df['Ktemp'] = df['Ktemp'].astype(np.float32)
+
+    return df[['time', 'year', 'month', 'day_of_year', 'Ftemp', 'Ktemp']]
+
+
+if __name__ == '__main__':
+    build_weather_data().to_parquet(DATA_DIR/'weather.parquet', compression='snappy', index=False)
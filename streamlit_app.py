@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from pathlib import Path
+from types import SimpleNamespace
 
 st.set_page_config(
     page_title='Cornell Tech Weather',
@@ -12,20 +10,187 @@ st.set_page_config(
     layout="wide"
 )
 
+MONTH_POSITIONS = (1, 32, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+MONTH_LABELS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+MONTH_NUMS = tuple(range(1, 13))
+SEASONS = ('All Year', 'Winter (Dec-Feb)', 'Spring (Mar-May)', 'Summer (Jun-Aug)', 'Fall (Sep-Nov)')
+COLOR_SCALES = ('RdBu_r', 'Viridis', 'Plasma', 'Inferno', 'Turbo')
+
+# Season id for each month number (index 0 unused)
+SEASON_MAP = np.array([0, 4, 4, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4], dtype=np.int8)
+SEASON_IDS = {
+    'Spring (Mar-May)': 1,
+    'Summer (Jun-Aug)': 2,
+    'Fall (Sep-Nov)': 3,
+    'Winter (Dec-Feb)': 4,
+}
+
+# Wider year ranges are binned in pairs; single-year stripes aren't
+# distinguishable at the chart's height anyway
+MAX_HEATMAP_YEARS = 40
+
 @st.cache_data
 def get_weather_data():
-    DATA_FILENAME = Path(__file__).parent/'data/weather.csv'
-    df = pd.read_csv(DATA_FILENAME)
+    # Built from data/weather.csv by build_data.py
+    DATA_FILENAME = Path(__file__).parent/'data/weather.parquet'
+    
+    # Polars is only needed to load the data, which is cached after the first run
+    import polars as pl
+    
+    # Keep the frame compact; the casts are no-ops when the file already matches
+    lf = pl.scan_parquet(DATA_FILENAME).select(
+        pl.col('year').cast(pl.Int16),
+        pl.col('month').cast(pl.Int8),
+        pl.col('day_of_year').cast(pl.Int16),
+        pl.col('Ftemp').cast(pl.Float32),
+    ).sort('year', 'day_of_year')
+    
+    # The filters below only ever select whole (year, month) cells, so the
+    # rollup can be computed once here and filtered on each rerun. It comes
+    # out sorted by year, which lets year_slice use searchsorted.
+    monthly_lf = lf.group_by('year', 'month', maintain_order=True).agg(
+        pl.col('Ftemp').mean().alias('Ftemp'),
+        pl.col('Ftemp').sum().alias('Fsum'),
+        pl.col('Ftemp').min().alias('Fmin'),
+        pl.col('Ftemp').max().alias('Fmax'),
+        pl.len().alias('count'),
+    )
+    df, monthly = pl.collect_all([lf, monthly_lf])
+    
+    # Plain contiguous column arrays for the heatmap path, which only needs
+    # raw values and integer slice bounds
+    arrays = SimpleNamespace(
+        year=df['year'].to_numpy(),
+        doy=df['day_of_year'].to_numpy(),
+        ftemp=df['Ftemp'].to_numpy(),
+        season_id=SEASON_MAP[df['month'].to_numpy()],
+    )
+    
+    monthly = monthly.to_pandas()
+    monthly['season_id'] = SEASON_MAP[monthly['month'].values]
+    # Legend labels for the line chart, built once instead of per rerun
+    year_labels = [str(year) for year in range(arrays.year[0], arrays.year[-1] + 1)]
+    monthly['year_str'] = pd.Categorical(
+        monthly['year'].astype(str), categories=year_labels, ordered=True
+    )
+    
+    return arrays, monthly
+
+def year_bounds(years, year_lo, year_hi):
+    start = np.searchsorted(years, year_lo, side='left')
+    stop = np.searchsorted(years, year_hi, side='right')
+    return start, stop
+
+def year_slice(data, year_lo, year_hi):
+    start, stop = year_bounds(data['year'].values, year_lo, year_hi)
+    return data.iloc[start:stop]
+
+def filter_season(data, season_id):
+    # 'All Year' has no id and keeps every row
+    if season_id is not None:
+        data = data[data['season_id'].values == season_id]
+    return data
+
+# The compute_* helpers are pure functions of the widget values, so caching
+# them makes revisiting a year range/season combination instant
+@st.cache_data(max_entries=64)
+def compute_year_bins(year_lo, year_hi):
+    # Years per heatmap row, and each row's label; an odd last year gets a row to itself
+    years = np.arange(year_lo, year_hi + 1)
+    if len(years) <= MAX_HEATMAP_YEARS:
+        return 1, years.astype(str)
+    labels = [f"{year}–{year + 1}" if year < year_hi else str(year) for year in years[::2]]
+    return 2, np.array(labels)
+
+@st.cache_data(max_entries=64)
+def compute_heatmap_pivot(year_lo, year_hi, season_id):
+    arrays, _ = get_weather_data()
+    start, stop = year_bounds(arrays.year, year_lo, year_hi)
+    yi = arrays.year[start:stop] - year_lo
+    di = arrays.doy[start:stop] - 1
+    f = arrays.ftemp[start:stop]
+    if season_id is not None:
+        in_season = arrays.season_id[start:stop] == season_id
+        yi, di, f = yi[in_season], di[in_season], f[in_season]
+    
+    # year and day_of_year are small dense ints, so bin straight into a
+    # (year row, day) grid instead of hashing through groupby/pivot
+    bin_size, year_labels = compute_year_bins(year_lo, year_hi)
+    days = np.arange(1, 367)
+    cell = (yi.astype(np.intp) // bin_size) * len(days) + di
+    shape = (len(year_labels), len(days))
+    totals = np.bincount(cell, weights=f, minlength=shape[0] * shape[1]).reshape(shape)
+    counts = np.bincount(cell, minlength=shape[0] * shape[1]).reshape(shape)
+    
+    with np.errstate(invalid='ignore'):
+        pivot = (totals / counts).astype(np.float32)
+    
+    # Match the old pivot, which only had rows/columns for cells with data
+    has_data = counts > 0
+    rows = has_data.any(axis=1)
+    cols = has_data.any(axis=0)
+    
+    return pivot[rows][:, cols], year_labels[rows], days[cols]
+
+@st.cache_data(max_entries=64)
+def compute_monthly_avg(year_lo, year_hi, season_id):
+    _, monthly = get_weather_data()
+    return filter_season(year_slice(monthly, year_lo, year_hi), season_id)
+
+@st.cache_data(max_entries=64)
+def compute_stats(year_lo, year_hi, season_id):
+    stats_data = compute_monthly_avg(year_lo, year_hi, season_id)
+    avg_temp = stats_data['Fsum'].sum() / stats_data['count'].sum()
+    return avg_temp, stats_data['Fmax'].max(), stats_data['Fmin'].min()
+
+@st.cache_data(max_entries=64)
+def compute_monthly_figure(year):
+    # Plotly is imported where it's used so the first page render doesn't wait on it
+    import plotly.express as px
+    
+    _, monthly = get_weather_data()
+    monthly_avg = year_slice(monthly, year, year)
+    
+    fig = px.line(
+        monthly_avg,
+        x="month",
+        y="Ftemp",
+        color='year_str',
+        title=f"Monthly Average Temperature, {year}",
+        labels={"month": "Month", "Ftemp": "Avg Temp (°F)", "year_str": "Year"},
+        range_y=[monthly['Ftemp'].min()-5, monthly['Ftemp'].max()+5]
+    )
+    
+    # Faded all-years average for context
+    climatology = monthly.groupby('month')[['Fsum', 'count']].sum()
+    fig.add_scatter(
+        x=climatology.index,
+        y=climatology['Fsum'] / climatology['count'],
+        mode='lines',
+        name='All years',
+        line=dict(color='gray', dash='dash'),
+        opacity=0.5,
+    )
     
-    df['time'] = pd.to_datetime(df['time'])
-    df['year'] = df['time'].dt.year
-    df['month'] = df['time'].dt.month
-    df['day_of_year'] = df['time'].dt.dayofyear
-    df['Ftemp'] = (df['Ktemp'] - 273.15) * (9/5) + 32
+    fig.update_xaxes(
+        tickvals=MONTH_NUMS,
+        ticktext=MONTH_LABELS
+    )
     
-    return df
+    return fig
 
-df = get_weather_data()
+@st.cache_data(max_entries=64)
+def compute_year_ticks(year_lo, year_hi):
+    # Every fifth year, starting from the first multiple of 5 in range, placed
+    # on the heatmap row that contains it
+    bin_size, year_labels = compute_year_bins(year_lo, year_hi)
+    first = ((year_lo + 4) // 5) * 5
+    year_ticks = np.arange(first, year_hi + 1, 5)
+    return year_labels[(year_ticks - year_lo) // bin_size], year_ticks.astype(str)
+
+arrays, _ = get_weather_data()
+min_year = int(arrays.year[0])
+max_year = int(arrays.year[-1])
 
 '''
 # :sunny: Cornell Tech Weather Dashboard
@@ -37,21 +202,14 @@ to visualize temperature patterns and trends over time.
 ''
 ''
 
-st.sidebar.header('Visualization Controls')
-viz_type = st.sidebar.radio(
-    'Visualization Type',
-    ['Monthly Averages', 'Heatmap']
-)
-
-if viz_type == 'Heatmap':
+# Each view is a fragment, so its own widgets only rerun that view
+@st.fragment
+def render_heatmap():
     st.header('Temperature Heatmap', divider='gray')
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        min_year = int(df['year'].min())
-        max_year = int(df['year'].max())
-        
         year_range = st.slider(
             'Year Range',
             min_value=min_year,
@@ -59,59 +217,41 @@ if viz_type == 'Heatmap':
             value=[min_year, max_year])
     
     with col2:
-        seasons = ['All Year', 'Winter (Dec-Feb)', 'Spring (Mar-May)', 'Summer (Jun-Aug)', 'Fall (Sep-Nov)']
-        selected_season = st.selectbox('Season', seasons)
+        selected_season = st.selectbox('Season', SEASONS)
     
     with col3:
-        color_scales = ['RdBu_r', 'Viridis', 'Plasma', 'Inferno', 'Turbo']
-        selected_colorscale = st.selectbox('Color Scale', color_scales)
-    
-    filtered_df = df[(df['year'] >= year_range[0]) & (df['year'] <= year_range[1])]
-    
-    if selected_season == 'Winter (Dec-Feb)':
-        filtered_df = filtered_df[((filtered_df['month'] == 12) | (filtered_df['month'] <= 2))]
-    elif selected_season == 'Spring (Mar-May)':
-        filtered_df = filtered_df[(filtered_df['month'] >= 3) & (filtered_df['month'] <= 5)]
-    elif selected_season == 'Summer (Jun-Aug)':
-        filtered_df = filtered_df[(filtered_df['month'] >= 6) & (filtered_df['month'] <= 8)]
-    elif selected_season == 'Fall (Sep-Nov)':
-        filtered_df = filtered_df[(filtered_df['month'] >= 9) & (filtered_df['month'] <= 11)]
-    
-    heatmap_data = filtered_df.groupby(['year', 'day_of_year'])['Ftemp'].mean().reset_index()
-    heatmap_pivot = heatmap_data.pivot(index='year', columns='day_of_year', values='Ftemp')
-    
-    month_positions = [1, 32, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335]
-    month_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    
-    fig = px.imshow(
-        heatmap_pivot, 
-        labels=dict(x="Month", y="Year", color="Temperature (°F)"),
-        x=heatmap_pivot.columns,
-        y=heatmap_pivot.index,
-        color_continuous_scale=selected_colorscale,
-        aspect="auto"
-    )
+        selected_colorscale = st.selectbox('Color Scale', COLOR_SCALES)
     
-    fig.update_layout(
-        xaxis_title='Month',
-        yaxis_title='Year',
-        height=700,
-    )
+    season_id = SEASON_IDS.get(selected_season)
+    pivot, pivot_years, pivot_days = compute_heatmap_pivot(year_range[0], year_range[1], season_id)
+    avg_temp, max_temp, min_temp = compute_stats(year_range[0], year_range[1], season_id)
     
-    fig.update_xaxes(
-        tickvals=month_positions,
-        ticktext=month_labels,
-    )
+    year_ticks, year_tick_text = compute_year_ticks(year_range[0], year_range[1])
     
-    years = heatmap_pivot.index.tolist()
-    year_ticks = [year for year in years if year % 5 == 0]
-    fig.update_yaxes(
-        tickvals=year_ticks,
-        ticktext=[str(year) for year in year_ticks],
-    )
+    import plotly.graph_objects as go
     
-    fig.update_traces(
-        hovertemplate="Year: %{y}<br>Day: %{x}<br>Temperature: %{z:.1f}°F<extra></extra>"
+    # Plotly 6+ ships numeric arrays as base64 binary, so float32 z costs
+    # 4 bytes per cell on the wire instead of ~15 characters of JSON text
+    fig = go.Figure(
+        go.Heatmap(
+            z=pivot,
+            x=pivot_days,
+            y=pivot_years,
+            colorscale=selected_colorscale,
+            colorbar=dict(title="Temperature (°F)"),
+            hovertemplate="Year: %{y}<br>Day: %{x}<br>Temperature: %{z:.1f}°F<extra></extra>",
+        ),
+        layout=dict(
+            xaxis=dict(title='Month', tickvals=MONTH_POSITIONS, ticktext=MONTH_LABELS),
+            yaxis=dict(
+                title='Year',
+                type='category',
+                autorange='reversed',
+                tickvals=year_ticks,
+                ticktext=year_tick_text,
+            ),
+            height=700,
+        ),
     )
     
     st.plotly_chart(fig, use_container_width=True)
@@ -119,37 +259,27 @@ if viz_type == 'Heatmap':
     st.subheader("Temperature Statistics")
     col1, col2, col3 = st.columns(3)
     with col1:
-        avg_temp = filtered_df['Ftemp'].mean()
         st.metric("Average Temperature", f"{avg_temp:.1f}°F")
     with col2:
-        max_temp = filtered_df['Ftemp'].max()
         st.metric("Maximum Temperature", f"{max_temp:.1f}°F")
     with col3:
-        min_temp = filtered_df['Ftemp'].min()
         st.metric("Minimum Temperature", f"{min_temp:.1f}°F")
 
-else:
-    filtered_df = df
-    
+@st.fragment
+def render_monthly():
     st.header('Monthly Average Temperatures', divider='gray')
     
-    monthly_avg = filtered_df.groupby(['year', 'month'])['Ftemp'].mean().reset_index()
-
-    anim_fig = px.line(
-        monthly_avg,
-        x="month",
-        y="Ftemp",
-        color=monthly_avg['year'].astype(str),
-        title="Monthly Average Temperature Animation",
-        labels={"month": "Month", "Ftemp": "Avg Temp (°F)", "color": "Year"},
-        animation_frame='year',
-        range_y=[monthly_avg['Ftemp'].min()-5, monthly_avg['Ftemp'].max()+5]
-    )
-    
-    anim_fig.update_xaxes(
-        tickvals=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
-        ticktext=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    )
+    year_sel = st.slider('Year', min_value=min_year, max_value=max_year, value=max_year)
     
-    st.plotly_chart(anim_fig, use_container_width=True)
+    st.plotly_chart(compute_monthly_figure(year_sel), use_container_width=True)
 
+st.sidebar.header('Visualization Controls')
+viz_type = st.sidebar.radio(
+    'Visualization Type',
+    ['Monthly Averages', 'Heatmap']
+)
+
+if viz_type == 'Heatmap':
+    render_heatmap()
+else:
+    render_monthly()